@@ -1,54 +1,171 @@
 import os
 import sys
 import time
-import json
 import re
 import tempfile
 import shutil
 import base64
-import PyPDF2
+import hashlib
+import io
+import sqlite3
+import socket
+import threading
 
-from urllib.parse import urljoin, urlparse
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urljoin, urlparse, urlsplit, urlunsplit
 from pathlib import Path
 
 from selenium import webdriver
 from selenium.webdriver.firefox.options import Options
 from selenium.webdriver.firefox.service import Service as FirefoxService
 from selenium.webdriver.common.by import By
+from selenium.webdriver.common.print_page_options import PrintOptions
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import inch
-from reportlab.lib.utils import ImageReader
+import urllib3
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
 
 from tqdm import tqdm
 
 
+# Query parameters used only for analytics/ad attribution
+_TRACKING_PARAM_RE = re.compile(r"^(?:utm_\w+|fbclid|gclid|dclid|msclkid|mc_cid|mc_eid|_ga)$", re.IGNORECASE)
+
+# scheme://netloc prefix of an absolute URL
+_NETLOC_RE = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*://([^/?#]*)")
+
+
+def _netloc(url):
+    """Return the lowercased netloc of a URL without a full urlparse"""
+    match = _NETLOC_RE.match(url)
+    if match:
+        return match.group(1).lower()
+    return urlparse(url).netloc.lower()
+
+
 class WebsitePDFCrawler:
+    # Downloads, non-HTTP schemes and auth/search pages, matched in a single pass
+    _SKIP_RE = re.compile(
+        r"\.(?:pdf|docx?|zip|exe|jpe?g|png|gif)(?:$|[?#])"
+        r"|^(?:mailto|tel|javascript):"
+        r"|/(?:search\?|login|logout|register)",
+        re.IGNORECASE
+    )
+    
+    # Status of a URL in the state database
+    URL_QUEUED, URL_DONE, URL_FAILED = 0, 1, 2
+    
+    # Maximum number of per-URL link filter verdicts to remember
+    FILTER_CACHE_SIZE = 100_000
+    
+    # Checkpoint resume state after this many pages or seconds, whichever comes first
+    STATE_SAVE_INTERVAL = 10
+    STATE_SAVE_SECONDS = 30
+    
+    # Window size for the screenshot fallback; long pages are captured in tiles
+    FALLBACK_TILE_WIDTH = 1200
+    FALLBACK_TILE_HEIGHT = 2000
+    
+    # Pages with less visible text than this are not deduplicated by content
+    MIN_DEDUP_TEXT_LENGTH = 500
+    
+    # HTML responses larger than this are not worth rendering
+    MAX_PROBE_CONTENT_LENGTH = 10_000_000
+    
     def __init__(self, base_url, output_file="website.pdf", max_pages=50, headless=True, 
                  generate_index=False, include_patterns=None, exclude_patterns=None, 
-                 max_depth=None, resume=False, state_file="crawler_state.json"):
-        self.base_url = base_url.rstrip('/')
+                 max_depth=None, resume=False, state_file="crawler_state.db", workers=1,
+                 fast_mode=False, print_backgrounds=False, probe_links=False,
+                 wait_strategy="complete", dedup_content=False):
+        self.base_url = self._canon(base_url)
         self.domain = urlparse(base_url).netloc
+        self._base_parsed = urlparse(self.base_url)
+        self._base_depth = len(self._base_parsed.path.rstrip('/').split('/'))
+        self._domain = self.domain.lower()
         self.output_file = output_file
         self.max_pages = max_pages
         self.headless = headless
         self.generate_index = generate_index
         self.include_patterns = include_patterns or []
         self.exclude_patterns = exclude_patterns or []
+        self._include_res = self._compile_patterns(self.include_patterns)
+        self._exclude_res = self._compile_patterns(self.exclude_patterns)
+        self._filter_cache = OrderedDict()
+        
+        # Final URLs and text hashes of captured pages, shared with pool workers
+        self._rendered_keys = set()
+        self._dedup_lock = threading.Lock()
         self.max_depth = max_depth
         self.resume = resume
         self.state_file = state_file
+        self.workers = max(1, workers)
+        self.fast_mode = fast_mode
+        self.print_backgrounds = print_backgrounds
+        self.probe_links = probe_links
+        self.wait_strategy = wait_strategy
+        self.dedup_content = dedup_content
+        self._http = self._build_http_pool() if probe_links else None
         
         self.visited_urls = set()
-        self.urls_to_visit = []
+        self.urls_to_visit = deque()
+        self._queued_urls = set()
+        self._rejected_urls = set()
         self.pdf_files = []
         self.page_info = []
         self.temp_dir = None
         self.driver = None
+        self.print_options = self._build_print_options()
+        
+        # SQLite resume state; changes are buffered and flushed by save_state()
+        self._state_db = None
+        self._pending_urls = []
+        self._pending_status = []
+        self._pending_pages = []
+        self._pending_rendered = []
+        self._pages_claimed = 0
+        self._pages_since_save = 0
+        self._last_save_time = time.monotonic()
+        self.writer = None
+    
+    @staticmethod
+    def _canon(url):
+        """Canonical form of a URL: lowercase scheme/host, no fragment, trailing slash or tracking params"""
+        parts = urlsplit(url)
+        path = parts.path.rstrip('/') or '/'
+        query = parts.query
+        if query:
+            # Tracking parameters never change the page, only the URL
+            query = '&'.join(
+                pair for pair in query.split('&')
+                if not _TRACKING_PARAM_RE.match(pair.split('=', 1)[0])
+            )
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ''))
+    
+    def _build_print_options(self):
+        """Explicit A4 print settings, skipping backgrounds unless requested"""
+        print_options = PrintOptions()
+        print_options.page_width = 21.0
+        print_options.page_height = 29.7
+        print_options.shrink_to_fit = True
+        print_options.background = self.print_backgrounds
+        return print_options
+        
+    def _build_http_pool(self):
+        """Shared keep-alive connection pool for HEAD probes, safe across probe threads"""
+        return urllib3.PoolManager(
+            maxsize=32,
+            block=False,
+            timeout=3,
+            retries=Retry(total=2, backoff_factor=0.1),
+            headers={"User-Agent": "pagebinder"},
+            socket_options=HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            ]
+        )
         
     def setup_driver(self):
         """Setup Firefox WebDriver with proper options"""
@@ -62,6 +179,35 @@ class WebsitePDFCrawler:
         options.set_preference("print.always_print_silent", True)
         options.set_preference("print.show_print_progress", False)
         
+        # Cut browser startup and background work: no updates, telemetry or
+        # safe-browsing lookups, and keep fetched resources cached in memory
+        options.set_preference("app.update.enabled", False)
+        options.set_preference("app.update.auto", False)
+        options.set_preference("browser.safebrowsing.malware.enabled", False)
+        options.set_preference("browser.safebrowsing.phishing.enabled", False)
+        options.set_preference("datareporting.healthreport.uploadEnabled", False)
+        options.set_preference("datareporting.policy.dataSubmissionEnabled", False)
+        options.set_preference("toolkit.telemetry.enabled", False)
+        options.set_preference("dom.webnotifications.enabled", False)
+        options.set_preference("dom.push.enabled", False)
+        options.set_preference("browser.cache.disk.enable", True)
+        options.set_preference("browser.cache.memory.capacity", 65536)
+        
+        # The crawler drives a single tab, so one content process is enough;
+        # this keeps each pool worker's Firefox far lighter on RAM
+        options.set_preference("dom.ipc.processCount", 1)
+        options.set_preference("fission.autostart", False)
+        
+        # Skip heavy subresources when visual fidelity is not needed
+        if self.fast_mode:
+            options.set_preference("permissions.default.image", 2)
+            options.set_preference("gfx.downloadable_fonts.enabled", False)
+            options.set_preference("media.autoplay.default", 5)
+            options.set_preference("network.http.max-persistent-connections-per-server", 8)
+        
+        # Return from get() at DOMContentLoaded instead of waiting on every subresource
+        options.page_load_strategy = "eager"
+        
         # Set geckodriver path
         geckodriver_path = self.get_geckodriver_path()
         
@@ -69,6 +215,8 @@ class WebsitePDFCrawler:
             service = FirefoxService(executable_path=geckodriver_path)
             self.driver = webdriver.Firefox(service=service, options=options)
             self.driver.set_window_size(1200, 800)
+            self.driver.set_page_load_timeout(10)
+            self.driver.set_script_timeout(10)
             print("✓ Firefox driver initialized successfully")
         except WebDriverException as e:
             print(f"✗ Error initializing Firefox driver: {e}")
@@ -91,24 +239,35 @@ class WebsitePDFCrawler:
     
     def is_same_domain(self, url):
         """Check if URL belongs to the same domain"""
-        return urlparse(url).netloc == self.domain
+        return _netloc(url) == self._domain
     
     def _get_url_depth(self, url):
         """Calculate URL depth from base URL"""
-        base_path = urlparse(self.base_url).path.rstrip('/').split('/')
-        url_path = urlparse(url).path.rstrip('/').split('/')
-        return len(url_path) - len(base_path)
+        return len(urlparse(url).path.rstrip('/').split('/')) - self._base_depth
+    
+    @staticmethod
+    def _compile_patterns(patterns):
+        """Compile URL patterns, fused into one alternation when possible"""
+        compiled = [re.compile(pattern) for pattern in patterns]
+        # Fusing renumbers groups, which would change what backreferences match
+        if len(compiled) > 1 and all(regex.groups == 0 for regex in compiled):
+            try:
+                return [re.compile("|".join(f"(?:{pattern})" for pattern in patterns))]
+            except re.error:
+                # Patterns with global inline flags such as (?i) cannot be nested
+                pass
+        return compiled
     
     def _matches_patterns(self, url):
         """Check if URL matches include/exclude patterns"""
         # If include patterns specified, URL must match at least one
-        if self.include_patterns:
-            if not any(re.search(pattern, url) for pattern in self.include_patterns):
+        if self._include_res:
+            if not any(regex.search(url) for regex in self._include_res):
                 return False
         
         # If exclude patterns specified, URL must not match any
-        if self.exclude_patterns:
-            if any(re.search(pattern, url) for pattern in self.exclude_patterns):
+        if self._exclude_res:
+            if any(regex.search(url) for regex in self._exclude_res):
                 return False
         
         return True
@@ -129,148 +288,440 @@ class WebsitePDFCrawler:
         except Exception as e:
             return self.driver.current_url
     
-    def get_page_links(self, current_url):
-        """Extract all links from the current page"""
-        links = []
+    def _extract_links_now(self, current_url):
+        """Extract all links from the already-loaded current page"""
         try:
-            WebDriverWait(self.driver, 30).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
+            # One script call instead of a WebDriver round-trip per anchor
+            hrefs = self.driver.execute_script(
+                "return Array.from(document.querySelectorAll('a[href]'), a => a.href);"
             )
-        
-            anchor_elements = self.driver.find_elements(By.TAG_NAME, "a")
-        
-            for anchor in anchor_elements:
-                href = anchor.get_attribute("href")
-                if href:
-                    full_url = urljoin(current_url, href)
-                    full_url = full_url.split('#')[0].rstrip('/')
-                
-                    if (full_url.startswith(('http://', 'https://')) and
-                        self.is_same_domain(full_url) and
-                        full_url not in self.visited_urls and
-                        full_url not in links and
-                        not self._should_skip_url(full_url) and
-                        self._matches_patterns(full_url) and
-                        (self.max_depth is None or self._get_url_depth(full_url) <= self.max_depth)):
-                        links.append(full_url)
     
         except Exception as e:
             print(f"Warning: Error extracting links from {current_url}: {e}")
+            return []
+    
+        return self._filter_links(hrefs or [])
+    
+    def _filter_links(self, hrefs):
+        """Keep crawlable same-domain links from a list of absolute hrefs"""
+        links = []
+        links_seen = set()
+        for href in hrefs:
+            if href:
+                # a.href is already resolved by the browser, so no urljoin needed
+                try:
+                    full_url = self._canon(href)
+                    admissible = (full_url not in self.visited_urls and
+                                  full_url not in links_seen and
+                                  self._is_admissible(full_url))
+                except ValueError:
+                    # The browser hands back hrefs it cannot parse (e.g. "http://[broken") as-is
+                    continue
+            
+                if admissible:
+                    links_seen.add(full_url)
+                    links.append(full_url)
     
         return links
+    
+    def _is_admissible(self, url):
+        """Check scheme, domain, skip list, patterns and depth, caching the verdict per URL"""
+        cached = self._filter_cache.get(url)
+        if cached is not None:
+            self._filter_cache.move_to_end(url)
+            return cached
+        
+        admissible = (url.startswith(('http://', 'https://')) and
+                      self.is_same_domain(url) and
+                      not self._should_skip_url(url) and
+                      self._matches_patterns(url) and
+                      (self.max_depth is None or self._get_url_depth(url) <= self.max_depth))
+        
+        # Navigation links repeat on every page; keep the cache bounded (LRU)
+        self._filter_cache[url] = admissible
+        if len(self._filter_cache) > self.FILTER_CACHE_SIZE:
+            self._filter_cache.popitem(last=False)
+        return admissible
 
     def _should_skip_url(self, url):
         """Skip URLs that typically cause issues"""
-        skip_patterns = [
-            '.pdf', '.doc', '.zip', '.exe', '.jpg', '.png', '.gif',
-            'mailto:', 'tel:', 'javascript:',
-            '/search?', '/login', '/logout', '/register'
-        ]
-        return any(pattern in url.lower() for pattern in skip_patterns)
+        return bool(self._SKIP_RE.search(url))
+    
+    def _probe_is_html(self, url):
+        """Cheap HEAD request to check a URL is an HTML page worth a browser visit"""
+        try:
+            response = self._http.request("HEAD", url)
+        except urllib3.exceptions.HTTPError:
+            # Network hiccups are not proof the page is bad
+            return True
+        except ValueError:
+            # urllib3 follows redirects itself and chokes on a malformed Location
+            return False
+        
+        if response.status >= 500:
+            # Server errors may be transient (or a rejected HEAD); let the browser try
+            return True
+        if response.status >= 400:
+            # Some servers reject HEAD outright; let the browser try those
+            return response.status == 405
+        
+        # Follow the redirect chain to see where the page really lives
+        final_url = url
+        for hop in (response.retries.history if response.retries else ()):
+            if hop.redirect_location:
+                try:
+                    final_url = urljoin(final_url, hop.redirect_location)
+                except ValueError:
+                    # A malformed Location header leads nowhere the browser could go
+                    return False
+        if not self.is_same_domain(final_url):
+            return False
+        
+        content_type = response.headers.get('Content-Type', '').lower()
+        try:
+            content_length = int(response.headers.get('Content-Length') or 0)
+        except ValueError:
+            # Malformed or repeated values (e.g. "10, 10") just mean the size is unknown
+            content_length = 0
+        return ((not content_type or 'html' in content_type) and
+                content_length <= self.MAX_PROBE_CONTENT_LENGTH)
+    
+    def _probe_links(self, urls):
+        """Drop links whose HEAD response shows an error, a redirect off-site or non-HTML"""
+        if not urls:
+            return urls
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            verdicts = list(executor.map(self._probe_is_html, urls))
+        return [url for url, is_html in zip(urls, verdicts) if is_html]
     
     def save_page_as_pdf(self, url, filename):
-        """Save current page as PDF using Firefox's print function"""
+        """Save page as PDF using Firefox's print function, returning (success, links, dedup_keys)"""
+        dedup_keys = ()
         try:
-            self.driver.get(url)
+            try:
+                self.driver.get(url)
+            except TimeoutException:
+                # Slow trackers or media are still loading; print what we have
+                self.driver.execute_script("window.stop();")
             
             WebDriverWait(self.driver, 30).until(
                 EC.presence_of_element_located((By.TAG_NAME, "body"))   
             )
-            time.sleep(5)
+            self._wait_for_page_ready()
             
-            pdf_data = self.driver.print_page()
+            # Redirects and URL variants often land on a page we already have
+            dedup_keys = self._page_dedup_keys()
+            if not self._claim_render(dedup_keys):
+                print(f"Skipping {url}: same page as one already captured")
+                return False, [], ()
             
-            with open(filename, "wb") as f:
-                f.write(base64.b64decode(pdf_data))
+            pdf_data = self.driver.print_page(self.print_options)
             
-            return True
+            self._write_pdf_data(filename, pdf_data)
             
         except Exception as e:
             print(f"Error saving {url} as PDF: {e}")
-            return self._save_page_screenshot_fallback(url, filename)
+            if not self._save_page_screenshot_fallback(url, filename):
+                self._release_render(dedup_keys)
+                return False, [], ()
+        
+        # Harvest links from the same page load rather than waiting on it again
+        try:
+            links = self._extract_links_now(url)
+        except Exception:
+            self._release_render(dedup_keys)
+            raise
+        return True, links, dedup_keys
+    
+    def _page_dedup_keys(self):
+        """Keys identifying the loaded page: its final URL and, if enabled, a text hash"""
+        keys = [f"url:{self._canon(self.driver.current_url)}"]
+        # Text can match across pages whose content has not rendered yet, so
+        # content dedup is opt-in
+        if not self.dedup_content:
+            return keys
+        text = self.driver.execute_script(
+            "return document.body ? document.body.innerText : '';"
+        ) or ''
+        # Near-empty pages (e.g. JS shells) would all hash alike, so skip those
+        if len(text) >= self.MIN_DEDUP_TEXT_LENGTH:
+            digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+            keys.append(f"text:{digest}")
+        return keys
+    
+    def _claim_render(self, keys):
+        """Reserve dedup keys for a render; False if any belongs to a captured page"""
+        with self._dedup_lock:
+            if any(key in self._rendered_keys for key in keys):
+                return False
+            self._rendered_keys.update(keys)
+            return True
+    
+    def _release_render(self, keys):
+        """Give back dedup keys of a render that failed"""
+        with self._dedup_lock:
+            self._rendered_keys.difference_update(keys)
+    
+    @staticmethod
+    def _write_pdf_data(filename, pdf_data):
+        """Decode base64 print output and write it with raw, unbuffered fd writes"""
+        decoded = memoryview(base64.b64decode(pdf_data))
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+        fd = os.open(filename, flags, 0o644)
+        try:
+            while decoded:
+                decoded = decoded[os.write(fd, decoded):]
+        finally:
+            os.close(fd)
+    
+    def _wait_for_page_ready(self, timeout=10):
+        """Wait for the page according to wait_strategy instead of sleeping blindly"""
+        # "eager": DOMContentLoaded (already reached when get() returns) is enough
+        if self.wait_strategy == "eager":
+            return
+        
+        try:
+            WebDriverWait(self.driver, timeout).until(
+                lambda d: d.execute_script("return document.readyState") == "complete"
+            )
+            if self.wait_strategy == "networkidle":
+                self._wait_for_network_idle(timeout)
+        except TimeoutException:
+            # Still loading after the timeout; print the page as it stands
+            pass
+    
+    def _wait_for_network_idle(self, timeout, interval=0.25):
+        """Wait until no new resources are fetched between two samples"""
+        count_script = "return performance.getEntriesByType('resource').length"
+        deadline = time.monotonic() + timeout
+        last_count = self.driver.execute_script(count_script)
+        while time.monotonic() < deadline:
+            time.sleep(interval)
+            count = self.driver.execute_script(count_script)
+            if count == last_count:
+                return
+            last_count = count
     
     def _save_page_screenshot_fallback(self, url, filename):
-        """Fallback method using screenshot and reportlab"""
+        """Fallback method: screenshot the page in tiles, one A4 page per tile"""
+        from reportlab.pdfgen import canvas
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.utils import ImageReader
+        from PIL import Image
+        
         try:
-            total_height = self.driver.execute_script("return document.body.scrollHeight")
-            self.driver.set_window_size(1200, total_height)
+            original_size = self.driver.get_window_size()
+        except Exception as e:
+            print(f"Fallback method also failed: {e}")
+            return False
+        
+        try:
+            # A bounded viewport keeps each screenshot a few MB, however long the page
+            self.driver.set_window_size(self.FALLBACK_TILE_WIDTH, self.FALLBACK_TILE_HEIGHT)
             
-            screenshot_path = filename.replace('.pdf', '.png')
-            self.driver.save_screenshot(screenshot_path)
+            total_height, view_height = self.driver.execute_script(
+                "return [document.documentElement.scrollHeight, window.innerHeight];"
+            )
             
             c = canvas.Canvas(filename, pagesize=A4)
-            img = ImageReader(screenshot_path)
-            
             page_width, page_height = A4
-            c.drawImage(img, 0, 0, width=page_width, height=page_height, preserveAspectRatio=True)
-            c.save()
             
-            os.remove(screenshot_path)
+            for y in range(0, max(total_height, 1), view_height):
+                # The last scroll is clamped to the bottom, so crop the overlap
+                scroll_y = self.driver.execute_script(
+                    f"window.scrollTo(0, {y}); return window.scrollY;"
+                )
+                tile = Image.open(io.BytesIO(self.driver.get_screenshot_as_png()))
+                if scroll_y < y:
+                    scale = tile.height / view_height
+                    tile = tile.crop((0, round((y - scroll_y) * scale), tile.width, tile.height))
+                
+                c.drawImage(ImageReader(tile), 0, 0, width=page_width, height=page_height,
+                            preserveAspectRatio=True, anchor='n')
+                c.showPage()
+            
+            c.save()
             
             return True
             
         except Exception as e:
             print(f"Fallback method also failed: {e}")
             return False
+        
+        finally:
+            # The driver is reused for later pages, so always restore its size
+            try:
+                self.driver.set_window_size(original_size['width'], original_size['height'])
+            except Exception:
+                pass
+    
+    def fetch_page(self, url, pdf_filename):
+        """Render a page to PDF and return (success, title, outgoing links, dedup keys)"""
+        success, links, dedup_keys = self.save_page_as_pdf(url, pdf_filename)
+        if not success:
+            return False, None, [], ()
+        try:
+            page_title = self.get_page_title()
+        except Exception:
+            # The page will not be recorded, so its URL must stay capturable
+            self._release_render(dedup_keys)
+            raise
+        return True, page_title, links, dedup_keys
     
-    def get_pdf_page_count(self, pdf_path):
-        """Get the number of pages in a PDF file"""
+    def _append_page_pdf(self, pdf_path):
+        """Append a page PDF to the output writer, returning its page count (0 on failure)"""
+        from pypdf import PdfReader
+        
+        pages_before = len(self.writer.pages)
         try:
-            with open(pdf_path, 'rb') as f:
-                pdf_reader = PyPDF2.PdfReader(f)
-                return len(pdf_reader.pages)
+            self.writer.append(PdfReader(pdf_path, strict=False))
         except Exception as e:
-            print(f"Warning: Could not get page count for {pdf_path}: {e}")
-            return 1
+            print(f"Warning: Could not add {pdf_path} to output: {e}")
+            return 0
+        return len(self.writer.pages) - pages_before
+    
+    def _open_state_db(self, fresh=False):
+        """Open the SQLite state database, discarding any previous crawl if fresh"""
+        self._close_state_db()
+        if fresh:
+            self._remove_stale_temp_dir()
+            self._remove_state_files()
+        
+        self._state_db = sqlite3.connect(self.state_file)
+        self._state_db.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS meta(key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS urls(url TEXT PRIMARY KEY, status INTEGER DEFAULT 0);
+            CREATE TABLE IF NOT EXISTS pages(seq INTEGER PRIMARY KEY, url TEXT, title TEXT,
+                                             pdf_path TEXT, page_count INTEGER);
+            CREATE TABLE IF NOT EXISTS rendered(key TEXT PRIMARY KEY);
+        """)
+    
+    def _close_state_db(self):
+        """Close the state database connection if open"""
+        if self._state_db is not None:
+            self._state_db.close()
+            self._state_db = None
+    
+    def _remove_stale_temp_dir(self):
+        """Delete the page PDFs of a previous crawl whose state is being discarded"""
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            db = sqlite3.connect(self.state_file)
+            try:
+                row = db.execute("SELECT value FROM meta WHERE key = 'temp_dir'").fetchone()
+            finally:
+                db.close()
+        except sqlite3.Error:
+            return
+        if row and row[0] and os.path.isdir(row[0]):
+            shutil.rmtree(row[0], ignore_errors=True)
+    
+    def _remove_state_files(self):
+        """Delete the state database along with its WAL side files"""
+        for path in (self.state_file, f"{self.state_file}-wal", f"{self.state_file}-shm"):
+            if os.path.exists(path):
+                os.remove(path)
     
     def save_state(self):
-        """Save crawl state to JSON file"""
-        state = {
-            'base_url': self.base_url,
-            'visited_urls': list(self.visited_urls),
-            'urls_to_visit': self.urls_to_visit,
-            'pdf_files': self.pdf_files,
-            'page_info': self.page_info,
-            'temp_dir': self.temp_dir,
-            'timestamp': time.time()
-        }
+        """Flush pending crawl state to the state database in one transaction"""
+        if self._state_db is None:
+            return
+        
+        meta = [
+            ('base_url', self.base_url),
+            ('temp_dir', self.temp_dir),
+            ('pages_claimed', str(self._pages_claimed)),
+            ('timestamp', str(time.time())),
+        ]
         try:
-            with open(self.state_file, 'w') as f:
-                json.dump(state, f, indent=2)
-        except Exception as e:
+            with self._state_db:
+                self._state_db.executemany(
+                    "INSERT OR IGNORE INTO urls(url) VALUES (?)",
+                    ((url,) for url in self._pending_urls)
+                )
+                self._state_db.executemany(
+                    "UPDATE urls SET status = ? WHERE url = ?", self._pending_status
+                )
+                self._state_db.executemany(
+                    "INSERT INTO pages(url, title, pdf_path, page_count) VALUES (?, ?, ?, ?)",
+                    self._pending_pages
+                )
+                self._state_db.executemany(
+                    "INSERT OR IGNORE INTO rendered(key) VALUES (?)",
+                    ((key,) for key in self._pending_rendered)
+                )
+                self._state_db.executemany(
+                    "INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", meta
+                )
+            self._pending_urls = []
+            self._pending_status = []
+            self._pending_pages = []
+            self._pending_rendered = []
+            self._pages_since_save = 0
+            self._last_save_time = time.monotonic()
+        except sqlite3.Error as e:
             print(f"Warning: Could not save state: {e}")
     
+    def _maybe_save_state(self):
+        """Checkpoint state every STATE_SAVE_INTERVAL pages or STATE_SAVE_SECONDS"""
+        self._pages_since_save += 1
+        if (self._pages_since_save >= self.STATE_SAVE_INTERVAL or
+                time.monotonic() - self._last_save_time >= self.STATE_SAVE_SECONDS):
+            self.save_state()
+    
     def load_state(self):
-        """Load crawl state from JSON file"""
+        """Load crawl state from the state database"""
         if not os.path.exists(self.state_file):
             return False
         
         try:
-            with open(self.state_file, 'r') as f:
-                state = json.load(f)
+            self._open_state_db()
+            db = self._state_db
+            meta = dict(db.execute("SELECT key, value FROM meta"))
             
-            if state['base_url'] != self.base_url:
+            if meta.get('base_url') != self.base_url:
                 print("⚠️  State file is for a different URL, starting fresh")
+                self._close_state_db()
                 return False
             
-            self.visited_urls = set(state['visited_urls'])
-            self.urls_to_visit = state['urls_to_visit']
-            self.pdf_files = state['pdf_files']
-            self.page_info = state['page_info']
-            self.temp_dir = state['temp_dir']
+            # Pages still in flight when the crawl stopped were never marked
+            # done, so they are simply queued again
+            self.visited_urls = {
+                url for (url,) in db.execute("SELECT url FROM urls WHERE status != ?",
+                                             (self.URL_QUEUED,))
+            }
+            self.urls_to_visit = deque(
+                url for (url,) in db.execute("SELECT url FROM urls WHERE status = ? ORDER BY rowid",
+                                             (self.URL_QUEUED,))
+            )
+            self._queued_urls = set(self.urls_to_visit) | self.visited_urls
+            self.page_info = [
+                {'title': title, 'url': url, 'pdf_path': pdf_path, 'page_count': page_count}
+                for url, title, pdf_path, page_count in db.execute(
+                    "SELECT url, title, pdf_path, page_count FROM pages ORDER BY seq")
+            ]
+            self.pdf_files = [info['pdf_path'] for info in self.page_info]
+            self._rendered_keys = {key for (key,) in db.execute("SELECT key FROM rendered")}
+            self.temp_dir = meta.get('temp_dir')
+            self._pages_claimed = int(meta.get('pages_claimed', 0))
             
             print(f"✓ Resumed from previous state: {len(self.visited_urls)} pages already crawled")
             return True
             
         except Exception as e:
+            self._close_state_db()
             print(f"⚠️  Could not load state: {e}, starting fresh")
             return False
     
     def cleanup_state(self):
         """Remove state file after successful completion"""
+        self._close_state_db()
         if os.path.exists(self.state_file):
             try:
-                os.remove(self.state_file)
+                self._remove_state_files()
                 print("🗑️  State file cleaned up")
             except Exception as e:
                 print(f"Warning: Could not remove state file: {e}")
@@ -280,76 +731,206 @@ class WebsitePDFCrawler:
         print(f"🕷️  Starting crawl of {self.base_url}")
         
         # Try to resume if requested
-        if self.resume and self.load_state():
+        if not (self.resume and self.load_state()):
+            self._open_state_db(fresh=True)
+        elif not self.temp_dir or not os.path.exists(self.temp_dir):
             # Verify temp directory still exists
-            if not self.temp_dir or not os.path.exists(self.temp_dir):
-                print("⚠️  Temporary directory missing, starting fresh")
-                self.visited_urls = set()
-                self.urls_to_visit = []
-                self.pdf_files = []
-                self.page_info = []
-                self.temp_dir = None
+            print("⚠️  Temporary directory missing, starting fresh")
+            self.visited_urls = set()
+            self.urls_to_visit = deque()
+            self._queued_urls = set()
+            self.pdf_files = []
+            self.page_info = []
+            self._rendered_keys = set()
+            self.temp_dir = None
+            self._pages_claimed = 0
+            self._open_state_db(fresh=True)
         
         # Create temporary directory if needed
         if not self.temp_dir:
             self.temp_dir = tempfile.mkdtemp()
             print(f"Created temporary directory: {self.temp_dir}")
         
+        # Pages stream into the output writer as they are captured; pages from
+        # a resumed run are loaded into it first
+        from pypdf import PdfWriter
+        self.writer = PdfWriter()
+        for info in self.page_info:
+            info['page_count'] = self._append_page_pdf(info['pdf_path'])
+        self.page_info = [info for info in self.page_info if info['page_count']]
+        self.pdf_files = [info['pdf_path'] for info in self.page_info]
+        
         # Initialize with base URL if starting fresh
         if not self.urls_to_visit:
-            self.urls_to_visit = [self.base_url]
+            self._enqueue([self.base_url])
         
         # Progress tracking
         pbar = tqdm(total=self.max_pages, initial=len(self.visited_urls), desc="Crawling pages")
         
         try:
-            while self.urls_to_visit and len(self.visited_urls) < self.max_pages:
-                current_url = self.urls_to_visit.pop(0)
+            if self.workers > 1:
+                self._crawl_parallel(pbar)
+            else:
+                while self.urls_to_visit and len(self.visited_urls) < self.max_pages:
+                    current_url = self.urls_to_visit.popleft()
+                    
+                    if current_url in self.visited_urls:
+                        continue
+                    
+                    pdf_filename = self._claim_url(current_url)
+                    self._record_page(current_url, pdf_filename,
+                                      *self.fetch_page(current_url, pdf_filename))
+                    
+                    # Update progress and checkpoint state
+                    pbar.update(1)
+                    self._maybe_save_state()
+        
+        finally:
+            pbar.close()
+            # Final checkpoint, also on interrupt, so --resume loses nothing
+            self.save_state()
+        
+        print(f"Complete! Processed {len(self.visited_urls)} pages")
+    
+    def _crawl_parallel(self, pbar):
+        """Crawl using a pool of worker threads, each driving its own Firefox instance"""
+        print(f"Using {self.workers} parallel browser workers")
+        config = {
+            'base_url': self.base_url,
+            'headless': self.headless,
+            'include_patterns': self.include_patterns,
+            'exclude_patterns': self.exclude_patterns,
+            'max_depth': self.max_depth,
+            'fast_mode': self.fast_mode,
+            'print_backgrounds': self.print_backgrounds,
+            'wait_strategy': self.wait_strategy,
+            'dedup_content': self.dedup_content,
+        }
+        
+        # WebDriver sessions are not thread-safe, so every thread gets its own
+        # crawler and driver; the frontier stays with this (the main) thread
+        local = threading.local()
+        worker_crawlers = []
+        worker_lock = threading.Lock()
+        
+        def init_worker():
+            crawler = WebsitePDFCrawler(**config)
+            crawler._rendered_keys = self._rendered_keys
+            crawler._dedup_lock = self._dedup_lock
+            with worker_lock:
+                worker_crawlers.append(crawler)
+            crawler.setup_driver()
+            local.crawler = crawler
+        
+        def fetch(url, pdf_filename):
+            return local.crawler.fetch_page(url, pdf_filename)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, initializer=init_worker) as executor:
+                self._run_pool(executor, fetch, pbar)
+        finally:
+            for crawler in worker_crawlers:
+                if crawler.driver:
+                    crawler.driver.quit()
+    
+    def _run_pool(self, executor, fetch, pbar):
+        """Feed the frontier to the pool and record results as they complete"""
+        pending = {}
+        
+        def dispatch():
+            # Keep every worker busy while the frontier and page budget allow
+            while (self.urls_to_visit and len(pending) < self.workers and
+                   len(self.visited_urls) < self.max_pages):
+                current_url = self.urls_to_visit.popleft()
                 
                 if current_url in self.visited_urls:
                     continue
                 
-                self.visited_urls.add(current_url)
-                
-                # Generate PDF filename
-                pdf_filename = os.path.join(
-                    self.temp_dir, 
-                    f"page_{len(self.visited_urls):03d}.pdf"
-                )
+                pdf_filename = self._claim_url(current_url)
+                future = executor.submit(fetch, current_url, pdf_filename)
+                pending[future] = (current_url, pdf_filename)
+        
+        while True:
+            dispatch()
+            if not pending:
+                break
+            
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                current_url, pdf_filename = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # fetch_page gives back its dedup keys before raising
+                    print(f"Error processing {current_url}: {e}")
+                    result = (False, None, [], ())
                 
-                # Save page as PDF
-                if self.save_page_as_pdf(current_url, pdf_filename):
-                    page_title = self.get_page_title()
-                    
-                    self.page_info.append({
-                        'title': page_title,
-                        'url': current_url,
-                        'pdf_path': pdf_filename,
-                        'page_count': 0
-                    })
-                    
-                    self.pdf_files.append(pdf_filename)
-                    
-                    # Get links from current page and add to queue
-                    new_links = self.get_page_links(current_url)
-                    self.urls_to_visit.extend(new_links)
+                # Hand queued URLs to the freed worker before recording, which
+                # may block on link probes
+                dispatch()
+                self._record_page(current_url, pdf_filename, *result)
                 
-                # Update progress and save state
                 pbar.update(1)
-                self.save_state()
+                self._maybe_save_state()
+    
+    def _claim_url(self, url):
+        """Mark URL as visited and return the PDF filename reserved for it"""
+        self.visited_urls.add(url)
+        # Numbered by claim order so files from an interrupted run are never reused
+        self._pages_claimed += 1
+        return os.path.join(
+            self.temp_dir, 
+            f"page_{self._pages_claimed:03d}.pdf"
+        )
+    
+    def _record_page(self, url, pdf_filename, success, page_title, new_links, dedup_keys=()):
+        """Store a fetched page and add its links to the queue"""
+        if not success:
+            self._release_render(dedup_keys)
+            self._pending_status.append((self.URL_FAILED, url))
+            return
         
-        finally:
-            pbar.close()
+        # Merge the page into the output now, while the browsers keep working
+        page_count = self._append_page_pdf(pdf_filename)
+        if page_count:
+            self.page_info.append({
+                'title': page_title,
+                'url': url,
+                'pdf_path': pdf_filename,
+                'page_count': page_count
+            })
+            
+            self.pdf_files.append(pdf_filename)
+            self._pending_status.append((self.URL_DONE, url))
+            self._pending_pages.append((url, page_title, pdf_filename, page_count))
+            self._pending_rendered.extend(dedup_keys)
+        else:
+            self._release_render(dedup_keys)
+            self._pending_status.append((self.URL_FAILED, url))
         
-        print(f"Complete! Processed {len(self.visited_urls)} pages")
+        if self.probe_links:
+            candidates = [link for link in new_links
+                          if link not in self._queued_urls and link not in self._rejected_urls]
+            new_links = self._probe_links(candidates)
+            # Remember rejects so a broken nav link is not probed again on every page
+            self._rejected_urls.update(set(candidates).difference(new_links))
+        self._enqueue(new_links)
+    
+    def _enqueue(self, urls):
+        """Add URLs to the frontier, skipping any already queued or visited"""
+        for url in urls:
+            if url not in self._queued_urls:
+                self._queued_urls.add(url)
+                self.urls_to_visit.append(url)
+                self._pending_urls.append(url)
     
     def _build_hierarchical_structure(self):
         """Build tree structure from URLs for hierarchical index"""
         tree = {'_pages': [], '_children': {}}
+        base_path = self._base_parsed.path.rstrip('/')
         
         for info in self.page_info:
             # Get path relative to base URL
-            base_path = urlparse(self.base_url).path.rstrip('/')
             url_path = urlparse(info['url']).path.rstrip('/')
             
             # Remove base path to get relative path
@@ -384,18 +965,19 @@ class WebsitePDFCrawler:
         
         print("Generating hierarchical index with clickable links...")
         
-        index_filename = os.path.join(self.temp_dir, "index.pdf")
-        c = canvas.Canvas(index_filename, pagesize=A4)
+        from reportlab.pdfgen import canvas
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import inch
+        
+        # The index is small, so build it in memory rather than in temp_dir
+        index_buffer = io.BytesIO()
+        c = canvas.Canvas(index_buffer, pagesize=A4)
         width, height = A4
         
         # Title
         c.setFont("Helvetica-Bold", 20)
         c.drawString(1*inch, height - 1*inch, "Table of Contents")
         
-        # Calculate page counts
-        for info in self.page_info:
-            info['page_count'] = self.get_pdf_page_count(info['pdf_path'])
-        
         # Calculate starting pages (temporary, will adjust for index later)
         temp_page = 1
         for info in self.page_info:
@@ -473,70 +1055,66 @@ class WebsitePDFCrawler:
         for info in self.page_info:
             info['start_page'] = info['temp_start_page'] + index_page_count
         
-        # Add clickable links
-        self._add_links_to_index(index_filename, link_rects, index_page_count)
-        
         print(f"  ✓ Hierarchical index generated with {index_page_count} page(s)")
-        return index_filename, index_page_count
+        return index_buffer, index_page_count, link_rects
     
-    def _add_links_to_index(self, index_filename, link_rects, index_page_count):
-        """Add clickable link annotations to the index PDF"""
+    def _add_index_links(self, writer, link_rects, index_page_count):
+        """Add clickable link annotations from the index pages to the pages they list"""
+        from pypdf.annotations import Link
+        
         try:
-            with open(index_filename, 'rb') as f:
-                pdf_reader = PyPDF2.PdfReader(f)
-                pdf_writer = PyPDF2.PdfWriter()
-                
-                for page in pdf_reader.pages:
-                    pdf_writer.add_page(page)
-                
-                for link_info in link_rects:
-                    page_idx = link_info['page']
-                    rect = link_info['rect']
-                    dest_page = link_info['dest_page'] + index_page_count
-                    
-                    pdf_writer.add_link(
-                        page_number=page_idx,
-                        page_destination=dest_page,
-                        rect=rect
+            for link_info in link_rects:
+                writer.add_annotation(
+                    page_number=link_info['page'],
+                    annotation=Link(
+                        rect=link_info['rect'],
+                        target_page_index=link_info['dest_page'] + index_page_count - 1
                     )
-                
-                with open(index_filename, 'wb') as output_file:
-                    pdf_writer.write(output_file)
-            
+                )
             print("  ✓ Added clickable links to index")
-            
         except Exception as e:
             print(f"  ⚠️  Warning: Could not add clickable links: {e}")
     
     def merge_pdfs(self):
-        """Merge all PDF files into a single document"""
+        """Write the pages merged during the crawl, plus the index, to a single document"""
         if not self.pdf_files:
             print("❌ No PDF files to merge")
             return False
             
-        print(f"Merging {len(self.pdf_files)} PDF files...")
+        print(f"Writing {len(self.pdf_files)} merged pages...")
+        
+        from pypdf import PdfReader
         
         try:
-            merger = PyPDF2.PdfMerger()
+            writer = self.writer
             
-            # Add index if requested
+            # Add index in front if requested
+            index_page_count = 0
             if self.generate_index:
                 index_result = self.generate_hierarchical_index_pdf()
                 if index_result:
-                    index_file, index_page_count = index_result
-                    merger.append(index_file)
+                    index_buffer, index_page_count, link_rects = index_result
+                    index_buffer.seek(0)
+                    writer.merge(0, PdfReader(index_buffer, strict=False))
+                    # Links go straight into the output writer, so the index
+                    # is never re-read and re-written just to annotate it
+                    self._add_index_links(writer, link_rects, index_page_count)
                     print(f"  ➕ Added index ({index_page_count} page(s))")
             
-            # Add all content PDFs
-            for pdf_file in self.pdf_files:
-                if os.path.exists(pdf_file):
-                    merger.append(pdf_file)
+            # One bookmark per captured page
+            start_page = index_page_count
+            for info in self.page_info:
+                writer.add_outline_item(info['title'], start_page)
+                start_page += info['page_count']
+            
+            # Share fonts/images repeated across pages to shrink the output
+            writer.compress_identical_objects()
             
             # Write merged PDF
             with open(self.output_file, 'wb') as output:
-                merger.write(output)
+                writer.write(output)
             
-            merger.close()
+            writer.close()
             print(f"Successfully created: {self.output_file}")
             return True
             
@@ -550,9 +1128,15 @@ class WebsitePDFCrawler:
             self.driver.quit()
             print("🔒 Firefox driver closed")
         
+        self._close_state_db()
+        
         if self.temp_dir and os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
-            print("🗑️  Temporary files cleaned up")
+            # Page PDFs are needed by --resume until the state file is cleaned up
+            if os.path.exists(self.state_file):
+                print(f"Temporary files kept for --resume: {self.temp_dir}")
+            else:
+                shutil.rmtree(self.temp_dir)
+                print("🗑️  Temporary files cleaned up")
     
     def run(self):
         """Main execution method"""
@@ -569,9 +1153,18 @@ class WebsitePDFCrawler:
                 print(f"Max depth: {self.max_depth}")
             if self.resume:
                 print("⏯ Resume mode enabled")
+            if self.fast_mode:
+                print("Fast mode enabled (images and web fonts disabled)")
+            if self.probe_links:
+                print("HEAD probing of discovered links enabled")
+            if self.wait_strategy != "complete":
+                print(f"Page wait strategy: {self.wait_strategy}")
+            if self.dedup_content:
+                print("Skipping pages with the same text as a captured page")
             
-            # Setup browser
-            self.setup_driver()
+            # Setup browser (pool workers start their own drivers)
+            if self.workers == 1:
+                self.setup_driver()
             
             # Crawl website
             self.crawl_website()
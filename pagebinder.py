@@ -1,3 +1,4 @@
+import re
 import sys
 import argparse
 from WebsiteCrawler import WebsitePDFCrawler
@@ -23,6 +24,9 @@ Examples:
   Resume interrupted crawl:
     python pagebinder.py https://example.com --resume
   
+  Crawl with 4 parallel browsers:
+    python pagebinder.py https://example.com -w 4 -m 200
+  
   Combine features:
     python pagebinder.py https://example.com -i --include "/api/" --max-depth 3 --resume
 """
@@ -39,6 +43,26 @@ Examples:
     parser.add_argument("--no-headless", action="store_true",
                        help="Run browser in visible mode (default: headless)")
     
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                       help="Number of parallel browser workers (default: 1)")
+    
+    parser.add_argument("--fast", action="store_true", dest="fast_mode",
+                       help="Skip images, web fonts and media for faster, lighter crawls")
+    
+    parser.add_argument("--print-backgrounds", action="store_true",
+                       help="Include background colors and images in the PDF (larger output)")
+    
+    parser.add_argument("--probe", action="store_true", dest="probe_links",
+                       help="Send a HEAD request before queueing links and skip non-HTML or broken pages")
+    
+    parser.add_argument("--wait-strategy", choices=["eager", "complete", "networkidle"],
+                       default="complete",
+                       help="When a page is ready to print: DOM parsed (eager), load event fired "
+                            "(complete) or no new network requests (networkidle) (default: complete)")
+    
+    parser.add_argument("--dedup-content", action="store_true",
+                       help="Also skip pages whose text matches an already captured page")
+    
     parser.add_argument("-i", "--index", action="store_true",
                        help="Generate hierarchical table of contents with clickable links")
     
@@ -56,8 +80,8 @@ Examples:
     parser.add_argument("--resume", action="store_true",
                        help="Resume from previous interrupted crawl")
     
-    parser.add_argument("--state-file", default="crawler_state.json",
-                       help="State file for resume functionality (default: crawler_state.json)")
+    parser.add_argument("--state-file", default="crawler_state.db",
+                       help="State file for resume functionality (default: crawler_state.db)")
     
     args = parser.parse_args()
 
@@ -66,18 +90,28 @@ Examples:
         print("❌ Error: URL must start with http:// or https://")
         sys.exit(1)
 
-    crawler = WebsitePDFCrawler(
-        base_url=args.url,
-        output_file=args.output,
-        max_pages=args.max_pages,
-        headless=not args.no_headless,
-        generate_index=args.index,
-        include_patterns=args.include_patterns,
-        exclude_patterns=args.exclude_patterns,
-        max_depth=args.max_depth,
-        resume=args.resume,
-        state_file=args.state_file
-    )
+    try:
+        crawler = WebsitePDFCrawler(
+            base_url=args.url,
+            output_file=args.output,
+            max_pages=args.max_pages,
+            headless=not args.no_headless,
+            generate_index=args.index,
+            include_patterns=args.include_patterns,
+            exclude_patterns=args.exclude_patterns,
+            max_depth=args.max_depth,
+            resume=args.resume,
+            state_file=args.state_file,
+            workers=args.workers,
+            fast_mode=args.fast_mode,
+            print_backgrounds=args.print_backgrounds,
+            probe_links=args.probe_links,
+            wait_strategy=args.wait_strategy,
+            dedup_content=args.dedup_content
+        )
+    except re.error as e:
+        print(f"❌ Error: Invalid --include/--exclude pattern: {e}")
+        sys.exit(1)
 
     crawler.run()
 